@@ -0,0 +1,201 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Constants
+NUM_POINTS = 500   # Maximum resolution for diagrams
+MIN_POINTS = 200   # Minimum resolution for diagrams
+POINTS_PER_SEGMENT = 20
+LOAD_COLUMNS = ['Load Type', 'Magnitude (kN)', 'Position (m)', 'Start Position (m)', 'End Position (m)']
+
+@dataclass
+class Loads:
+    """Beam loads stored as one flat array per quantity (kN, kN/m, m)."""
+    point_pos: np.ndarray
+    point_mag: np.ndarray
+    udl_start: np.ndarray
+    udl_end: np.ndarray
+    udl_w: np.ndarray
+    
+    def __len__(self):
+        return len(self.point_pos) + len(self.udl_w)
+
+def read_excel_cached(filepath):
+    """
+    Reads the Excel sheet through a sibling .parquet cache.
+    The cache records the workbook's (mtime, size) and is only reused on an exact
+    match, so any replaced workbook is re-read, even one with an older timestamp.
+    Without pyarrow/fastparquet the cache is simply skipped.
+    """
+    cache_path = os.path.splitext(filepath)[0] + '.parquet'
+    stat = os.stat(filepath)
+    source = [stat.st_mtime_ns, stat.st_size]
+    
+    if os.path.exists(cache_path):
+        try:
+            df = pd.read_parquet(cache_path)
+            if df.attrs.pop('source', None) == source:
+                return df
+        except (ImportError, OSError, ValueError):
+            pass # Unreadable cache, rebuild it below
+    
+    # pandas' openpyxl reader already opens the workbook read_only/data_only
+    df = pd.read_excel(filepath, engine='openpyxl')
+    try:
+        # DataFrame.attrs is stored in the parquet metadata
+        df.attrs['source'] = source
+        df.to_parquet(cache_path, index=False)
+    except (ImportError, OSError, ValueError, TypeError):
+        pass # No parquet engine or unwritable directory
+    finally:
+        df.attrs.pop('source', None)
+    return df
+
+def read_data(filepath):
+    """
+    Reads the Excel file and normalizes columns.
+    Expected columns in Excel: 'Load Type', 'Magnitude (kN)', 'Position (m)', 'Start Position (m)', 'End Position (m)'
+    Results are memoized on the file's modification time and size, so repeat calls
+    for an unchanged workbook return the already parsed data.
+    """
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Input file not found: {filepath}")
+    
+    stat = os.stat(filepath)
+    return read_data_cached(os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size)
+
+@lru_cache(maxsize=8)
+def read_data_cached(filepath, mtime_ns, size):
+    """Parses the workbook at filepath; mtime_ns and size are only part of the cache key."""
+    df = read_excel_cached(filepath)
+    
+    # Normalize data for internal use (missing columns read as NaN)
+    cols = df.reindex(columns=LOAD_COLUMNS)
+    l_type = cols['Load Type'].astype(str).str.lower()
+    is_point = l_type.str.contains('point').to_numpy()
+    is_udl = l_type.str.contains('udl').to_numpy() & ~is_point
+    
+    # Materialize each numeric column once as a float array
+    mag, pos, start, end = (cols[c].to_numpy(dtype=float) for c in LOAD_COLUMNS[1:])
+    
+    loads = Loads(
+        point_pos=np.where(np.isnan(pos), start, pos)[is_point], # Fallback
+        point_mag=mag[is_point],
+        udl_start=np.where(np.isnan(start), pos, start)[is_udl], # Fallback
+        udl_end=end[is_udl],
+        udl_w=mag[is_udl],
+    )
+    return df, loads
+
+def calculate_reactions(loads, length):
+    """
+    Calculates reactions Ra (left) and Rb (right) for a simply supported beam.
+    Sum(Ma) = 0  =>  Rb * L = Sum(Moment_loads_about_A)
+    Also returns the total applied load, which falls out of the same sums.
+    """
+    udl_total = loads.udl_w * (loads.udl_end - loads.udl_start)
+    udl_centroid = (loads.udl_start + loads.udl_end) / 2
+    
+    moment_sum_a = (loads.point_mag * loads.point_pos).sum() + (udl_total * udl_centroid).sum()
+    total_load = loads.point_mag.sum() + udl_total.sum()
+            
+    rb = moment_sum_a / length
+    ra = total_load - rb
+    
+    return ra, rb, total_load
+
+def build_segments(loads, ra, length):
+    """
+    Splits the beam at every load breakpoint. Between breakpoints the loading is
+    constant, so V is linear and M is quadratic in the local offset dx = x - x0:
+        V = v0 + q*dx,   M = m0 + v0*dx + q*dx^2/2
+    Segment k covers bp[k-1] < x <= bp[k] (segment 0 is x <= bp[0], the last one
+    is x > bp[-1]), matching the "load acts once the cut is right of it" rule.
+    """
+    bp = np.unique(np.concatenate(([0.0, length], loads.point_pos, loads.udl_start, loads.udl_end)))
+    
+    # Jumps at each breakpoint: point loads drop V, UDL ends change the slope of V
+    d_point = np.zeros(len(bp))
+    np.add.at(d_point, np.searchsorted(bp, loads.point_pos), loads.point_mag)
+    d_slope = np.zeros(len(bp))
+    np.add.at(d_slope, np.searchsorted(bp, loads.udl_start), -loads.udl_w)
+    np.add.at(d_slope, np.searchsorted(bp, loads.udl_end), loads.udl_w)
+    
+    q = np.cumsum(d_slope)  # dV/dx just right of each breakpoint
+    h = np.diff(bp)
+    v_right = ra - np.cumsum(d_point) + np.concatenate(([0.0], np.cumsum(q[:-1] * h)))
+    m_at = ra * bp[0] + np.concatenate(([0.0], np.cumsum(v_right[:-1] * h + q[:-1] * h**2 / 2)))
+    
+    x0 = np.concatenate(([bp[0]], bp))
+    v0 = np.concatenate(([ra], v_right))
+    q0 = np.concatenate(([0.0], q))
+    m0 = np.concatenate(([ra * bp[0]], m_at))
+    return bp, x0, v0, q0, m0
+
+def sample_count(n_segments):
+    """Number of diagram samples: a fixed density per load segment, within [MIN_POINTS, NUM_POINTS]."""
+    return min(NUM_POINTS, max(MIN_POINTS, POINTS_PER_SEGMENT * n_segments))
+
+def calculate_arrays(loads, ra, length, num_points=None):
+    """
+    Generates x, Shear(V), and Moment(M) arrays.
+    The segment polynomials are built once and each x is looked up in its segment.
+    By default the number of samples follows the number of load segments.
+    """
+    bp, x0, v0, q0, m0 = build_segments(loads, ra, length)
+    if num_points is None:
+        num_points = sample_count(len(bp) - 1)
+    x_vals = np.linspace(0, length, num_points)
+    shear_vals = np.empty(num_points)
+    moment_vals = np.empty(num_points)
+    
+    seg = np.searchsorted(bp, x_vals, side='left')
+    dx = x_vals - x0[seg]
+    v_seg = v0[seg]
+    q_seg = q0[seg]
+    
+    # V = v0 + q*dx,  M = m0 + (v0 + q/2*dx)*dx, written in place
+    np.multiply(q_seg, dx, out=shear_vals)
+    shear_vals += v_seg
+    np.multiply(q_seg / 2, dx, out=moment_vals)
+    moment_vals += v_seg
+    moment_vals *= dx
+    moment_vals += m0[seg]
+    
+    return x_vals, shear_vals, moment_vals
+
+def max_moment(loads, ra, length):
+    """
+    Exact absolute maximum bending moment and its position.
+    Candidates are the breakpoints plus the V = 0 root inside each UDL segment.
+    """
+    bp, x0, v0, q0, m0 = build_segments(loads, ra, length)
+    
+    # Finite segments bp[k-1] < x <= bp[k] are k = 1 .. len(bp) - 1
+    v, q, m = v0[1:-1], q0[1:-1], m0[1:-1]
+    h = np.diff(bp)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = -v / q
+    inside = (q != 0) & (t > 0) & (t < h)
+    
+    cand_x = np.concatenate((bp, bp[:-1][inside] + t[inside]))
+    cand_m = np.concatenate((m0[1:], m[inside] + v[inside] * t[inside] + q[inside] * t[inside]**2 / 2))
+    on_beam = (cand_x >= 0) & (cand_x <= length)
+    cand_x, cand_m = cand_x[on_beam], cand_m[on_beam]
+    
+    idx = np.argmax(np.abs(cand_m))
+    return cand_m[idx], cand_x[idx]
+
+def get_max_values(x_vals, V_vals, M_vals):
+    """Finds absolute maximums and their positions."""
+    idx_v = np.argmax(np.abs(V_vals))
+    idx_m = np.argmax(np.abs(M_vals))
+    return {
+        'v_max': V_vals[idx_v],
+        'v_pos': x_vals[idx_v],
+        'm_max': M_vals[idx_m],
+        'm_pos': x_vals[idx_m]
+    }
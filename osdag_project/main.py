@@ -1,8 +1,14 @@
-import pandas as pd
 import numpy as np
-from pylatex import Document, Section, Subsection, Command, Figure, TikZ, Axis, Plot, Itemize, Description
+from pylatex import Document, Section, Subsection, Figure, TikZ, Axis, Plot, Itemize, Description
 from pylatex.utils import NoEscape, bold
+import argparse
+import hashlib
 import os
+import shutil
+import subprocess
+import time
+
+from analysis import read_data, calculate_reactions, calculate_arrays, max_moment, get_max_values
 
 # CONFIG: Add MiKTeX to PATH manually
 miktex_path = r"C:\Users\saksh_623c2rt\AppData\Local\Programs\MiKTeX\miktex\bin\x64"
@@ -11,185 +17,158 @@ if miktex_path not in os.environ["PATH"]:
 
 # Constants
 OUTPUT_FILENAME = "report"
+INPUT_FILE = os.path.join(os.path.dirname(__file__), 'input_data.xlsx')
 BEAM_LENGTH = 10.0  # Default, can be adjusted based on load
-NUM_POINTS = 500   # Resolution for diagrams
 
-def read_data(filepath):
-    """
-    Reads the Excel file and normalizes columns.
-    Expected columns in Excel: 'Load Type', 'Magnitude (kN)', 'Position (m)', 'Start Position (m)', 'End Position (m)'
-    """
-    if not os.path.exists(filepath):
-        raise FileNotFoundError(f"Input file not found: {filepath}")
+# Fixed report preamble, identical for every run
+PREAMBLE_LINES = [
+    r'\usepackage{booktabs}',
+    r'\usepackage{pgfplots}',
+    r'\usepgfplotslibrary{fillbetween}',
+    r'\pgfplotsset{compat=1.18}',
+    r'\usepackage{fancyhdr}',
+    r'\usepackage{placeins}',
+    r'\usepackage{mathpazo}',
+    r'\usepackage{float}',
     
-    df = pd.read_excel(filepath)
+    r'\pagestyle{fancy}',
+    r'\fancyhf{}',
+    r'\rhead{\today}',
+    r'\lhead{Osdag Structural Analysis - Comprehensive Report}',
+    r'\cfoot{\thepage}',
     
-    # Normalize data for internal use
-    loads = []
-    
-    for _, row in df.iterrows():
-        l_type = str(row.get('Load Type', '')).lower()
-        mag = row.get('Magnitude (kN)', 0)
-        
-        if 'point' in l_type:
-            pos = row.get('Position (m)')
-            if pd.isna(pos): pos = row.get('Start Position (m)') # Fallback
-            loads.append({'type': 'point', 'mag': mag, 'pos': pos})
-            
-        elif 'udl' in l_type:
-            start = row.get('Start Position (m)')
-            end = row.get('End Position (m)')
-            if pd.isna(start): start = row.get('Position (m)') # Fallback
-            loads.append({'type': 'udl', 'mag': mag, 'start': start, 'end': end})
-            
-    return df, loads
+    # Title
+    r'\title{Detailed Engineering Report: Simply Supported Beam Analysis}',
+    r'\author{Osdag Internship Project {-} Advanced Module}',
+    r'\date{\today}',
+]
 
-def calculate_reactions(loads, length):
+def write_diagram_data(output_path, x_vals, v_vals, m_vals):
+    """
+    Writes the x, V and M samples as a whitespace table for pgfplots.
+    Returns the file name relative to the .tex file, which is where pdflatex runs.
     """
-    Calculates reactions Ra (left) and Rb (right) for a simply supported beam.
-    Sum(Ma) = 0  =>  Rb * L = Sum(Moment_loads_about_A)
+    data_path = output_path + '-diagrams.dat'
+    np.savetxt(data_path, np.column_stack((x_vals, v_vals, m_vals)), fmt='%.4f', header='x V M', comments='')
+    return os.path.basename(data_path)
+
+def emit_diagram(doc, data_file, column, caption, color, ylabel, length):
+    """Appends a filled pgfplots line diagram of one data_file column as a captioned figure."""
+    with doc.create(Figure(position='H')) as plot_fig:
+        plot_fig.append(NoEscape(r'\centering'))
+        with plot_fig.create(TikZ()) as tikz:
+            axis_options = r"width=0.9\textwidth, height=6.5cm, axis x line=middle, axis y line=left, xlabel={Position (m)}, ylabel={" + ylabel + r"}, grid=major, enlarge x limits=false"
+            tikz.append(NoEscape(r'\begin{axis}[' + axis_options + r']'))
+            tikz.append(NoEscape(r'\addplot[name path=f, ' + color + r', thick] table[x=x, y=' + column + r'] {' + data_file + r'};'))
+            tikz.append(NoEscape(r'\path[name path=axis] (axis cs:0,0) -- (axis cs:' + str(length) + r',0);'))
+            tikz.append(NoEscape(r'\addplot[' + color + r'!10] fill between[of=f and axis];'))
+            tikz.append(NoEscape(r'\end{axis}'))
+        plot_fig.add_caption(caption)
+
+def build_preamble_format(doc, output_path):
     """
-    moment_sum_a = 0
-    total_load = 0
+    Precompiles the document preamble into a pdflatex format with mylatexformat,
+    so pgfplots, mathpazo etc. are not reloaded on every compile.
+    The format is named after a hash of the preamble and the pdflatex version, so
+    it is rebuilt when either changes. A failed build leaves a .failed marker and
+    is not retried. Returns the format name, or None if there is no usable format.
+    """
+    if shutil.which('pdflatex') is None:
+        return None
+    
+    try:
+        version = subprocess.run(['pdflatex', '--version'], check=True, capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    
+    dest_dir = os.path.dirname(os.path.abspath(output_path))
+    preamble = doc.dumps().split(r'\begin{document}')[0]
+    key = version.partition('\n')[0] + '\n' + preamble
+    fmt_name = 'preamble-' + hashlib.sha1(key.encode()).hexdigest()[:12]
+    fmt_base = os.path.join(dest_dir, fmt_name)
     
-    for load in loads:
-        if load['type'] == 'point':
-            P = load['mag']
-            x = load['pos']
-            moment_sum_a += P * x
-            total_load += P
-        elif load['type'] == 'udl':
-            w = load['mag'] # kN/m
-            x1 = load['start']
-            x2 = load['end']
-            span = x2 - x1
-            total_w = w * span
-            centroid = x1 + (span / 2)
-            moment_sum_a += total_w * centroid
-            total_load += total_w
-            
-    rb = moment_sum_a / length
-    ra = total_load - rb
+    if os.path.exists(fmt_base + '.fmt'):
+        return fmt_name
+    if os.path.exists(fmt_base + '.failed'):
+        return None
     
-    return ra, rb
+    with open(fmt_base + '.tex', 'w') as f:
+        f.write(preamble + '\\begin{document}\\end{document}\n')
+    try:
+        subprocess.run(
+            ['pdflatex', '-ini', '-interaction=nonstopmode', f'-jobname={fmt_name}',
+             '&pdflatex', 'mylatexformat.ltx', fmt_name + '.tex'],
+            cwd=dest_dir, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError):
+        # No mylatexformat (or a preamble it cannot dump): remember that, and
+        # compile the full preamble instead from now on
+        open(fmt_base + '.failed', 'w').close()
+        return None
+    finally:
+        for ext in ('.tex', '.log'):
+            if os.path.exists(fmt_base + ext):
+                os.remove(fmt_base + ext)
+    return fmt_name
 
-def calculate_arrays(loads, ra, length, num_points=NUM_POINTS):
+def compile_pdf(doc, output_path):
     """
-    Generates x, Shear(V), and Moment(M) arrays.
+    Compiles the document to output_path.pdf.
+    tectonic is preferred when installed: it caches its formats and reruns until
+    the table of contents settles. Otherwise pdflatex runs on the precompiled preamble.
     """
-    x_vals = np.linspace(0, length, num_points)
-    shear_vals = []
-    moment_vals = []
+    if shutil.which('tectonic') is not None:
+        doc.generate_tex(output_path)
+        try:
+            subprocess.run(['tectonic', os.path.basename(output_path) + '.tex'],
+                           cwd=os.path.dirname(os.path.abspath(output_path)), check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+            return
+        except (OSError, subprocess.CalledProcessError) as e:
+            # e.g. tectonic cannot fetch its bundle offline; pdflatex may still work
+            print(f"tectonic failed ({e}), falling back to pdflatex.")
     
-    for x in x_vals:
-        # Calculate V and M at section x (from left)
-        # V = Ra - Sum(Down_Loads)
-        # M = Ra*x - Sum(Moments_of_Down_Loads)
-        
-        v = ra
-        m = ra * x
-        
-        for load in loads:
-            if load['type'] == 'point':
-                P = load['mag']
-                xp = load['pos']
-                if x > xp: # Cut is to the right of load
-                    v -= P
-                    m -= P * (x - xp)
-                    
-            elif load['type'] == 'udl':
-                w = load['mag']
-                x1 = load['start']
-                x2 = load['end']
-                
-                # UDL covers overlap of [x1, x2] and [0, x]
-                # Actually, simpler: calculate portion of UDL to the left of x
-                
-                if x > x1:
-                    udl_end = min(x, x2)
-                    udl_span = udl_end - x1
-                    load_force = w * udl_span
-                    load_centroid = x1 + (udl_span / 2)
-                    
-                    v -= load_force
-                    m -= load_force * (x - load_centroid)
-                    
-        shear_vals.append(v)
-        moment_vals.append(m)
-        
-    return x_vals, np.array(shear_vals), np.array(moment_vals)
+    # The precompiled format skips the preamble, which dominates pdflatex startup
+    fmt_name = build_preamble_format(doc, output_path)
+    if fmt_name is not None:
+        try:
+            doc.generate_pdf(output_path, clean_tex=False, compiler='pdflatex', compiler_args=[f'-fmt={fmt_name}'])
+            return
+        except subprocess.CalledProcessError:
+            # e.g. a format pdflatex no longer accepts; drop it and compile in full
+            fmt_path = os.path.join(os.path.dirname(os.path.abspath(output_path)), fmt_name + '.fmt')
+            if os.path.exists(fmt_path):
+                os.remove(fmt_path)
+    doc.generate_pdf(output_path, clean_tex=False, compiler='pdflatex')
 
-def generate_tikz_coords(x_vals, y_vals):
-    """Generates coordinate string (x,y) for TikZ"""
-    coords = ""
-    # Downsample slightly for TikZ string length safety if needed, or use full
-    step = max(1, len(x_vals) // 200) 
-    for i in range(0, len(x_vals), step):
-        coords += f"({x_vals[i]:.2f},{y_vals[i]:.2f}) "
-    # Ensure last point is included
-    coords += f"({x_vals[-1]:.2f},{y_vals[-1]:.2f})"
-    return coords
-
-def get_max_values(x_vals, V_vals, M_vals):
-    """Finds absolute maximums and their positions."""
-    idx_v = np.argmax(np.abs(V_vals))
-    idx_m = np.argmax(np.abs(M_vals))
-    return {
-        'v_max': V_vals[idx_v],
-        'v_pos': x_vals[idx_v],
-        'm_max': M_vals[idx_m],
-        'm_pos': x_vals[idx_m]
-    }
-
-def create_report():
-    input_file = os.path.join(os.path.dirname(__file__), 'input_data.xlsx')
+def create_report(input_file=INPUT_FILE, output_path=OUTPUT_FILENAME, pdf=True):
+    """
+    Builds the engineering report for the loads in input_file.
+    output_path is the report path without extension (.tex/.pdf are appended).
+    With pdf=False only the .tex (and its diagram data) is written.
+    """
     image_file = os.path.join(os.path.dirname(__file__), 'beam_setup.png')
     
     print("Reading data...")
     raw_df, loads = read_data(input_file)
     
     # Determine beam length exactly from loads
-    positions = []
-    for l in loads:
-        if 'pos' in l: positions.append(l['pos'])
-        if 'end' in l: positions.append(l['end'])
-    
-    if positions:
-        L = float(max(positions))
-        # Ensure it doesn't shrink below default if no loads are far out
-        L = max(L, BEAM_LENGTH) 
-    else:
-        L = BEAM_LENGTH
+    # initial= keeps it from shrinking below default and covers empty load arrays
+    L = float(max(loads.point_pos.max(initial=BEAM_LENGTH), loads.udl_end.max(initial=BEAM_LENGTH)))
     
     print(f"Beam Length: {L}m")
-    ra, rb = calculate_reactions(loads, L)
+    ra, rb, total_load = calculate_reactions(loads, L)
     x, V, M = calculate_arrays(loads, ra, L)
     stats = get_max_values(x, V, M)
+    stats['m_max'], stats['m_pos'] = max_moment(loads, ra, L)
     
     # Create Document
     geometry_options = {"top": "1in", "bottom": "1in", "left": "1in", "right": "1in"}
     doc = Document(geometry_options=geometry_options)
     
     # Preamble
-    doc.preamble.append(NoEscape(r'\usepackage{booktabs}'))
-    doc.preamble.append(NoEscape(r'\usepackage{pgfplots}'))
-    doc.preamble.append(NoEscape(r'\usepgfplotslibrary{fillbetween}'))
-    doc.preamble.append(NoEscape(r'\pgfplotsset{compat=1.18}'))
-    doc.preamble.append(NoEscape(r'\usepackage{fancyhdr}'))
-    doc.preamble.append(NoEscape(r'\usepackage{placeins}'))
-    doc.preamble.append(NoEscape(r'\usepackage{mathpazo}'))
-    doc.preamble.append(NoEscape(r'\usepackage{float}'))
-    
-    doc.preamble.append(NoEscape(r'\pagestyle{fancy}'))
-    doc.preamble.append(NoEscape(r'\fancyhf{}'))
-    doc.preamble.append(NoEscape(r'\rhead{\today}'))
-    doc.preamble.append(NoEscape(r'\lhead{Osdag Structural Analysis - Comprehensive Report}'))
-    doc.preamble.append(NoEscape(r'\cfoot{\thepage}'))
+    for line in PREAMBLE_LINES:
+        doc.preamble.append(NoEscape(line))
     
-    # Title
-    doc.preamble.append(Command('title', 'Detailed Engineering Report: Simply Supported Beam Analysis'))
-    doc.preamble.append(Command('author', 'Osdag Internship Project - Advanced Module'))
-    doc.preamble.append(Command('date', NoEscape(r'\today')))
     doc.append(NoEscape(r'\maketitle'))
     doc.append(NoEscape(r'\thispagestyle{empty}'))
     doc.append(NoEscape(r'\tableofcontents'))
@@ -203,14 +182,14 @@ def create_report():
         doc.append(NoEscape(r'\par\medskip'))
         doc.append("Key findings include:")
         with doc.create(Itemize()) as itemize:
-            itemize.add_item(NoEscape(f"Total applied downward force: {sum(l['mag'] if l['type']=='point' else l['mag']*(l['end']-l['start']) for l in loads):.2f} kN"))
+            itemize.add_item(NoEscape(f"Total applied downward force: {total_load:.2f} kN"))
             itemize.add_item(NoEscape(f"Maximum Shear Force: {abs(stats['v_max']):.2f} kN at x = {stats['v_pos']:.2f} m"))
             itemize.add_item(NoEscape(f"Maximum Bending Moment: {abs(stats['m_max']):.2f} kNm at x = {stats['m_pos']:.2f} m"))
 
     # 2. Methodology
     with doc.create(Section('Methodology')):
         doc.append("The analysis is performed using the principles of static equilibrium. ")
-        doc.append("The beam is discretized into 500 segments to ensure high resolution in the resulting diagrams.")
+        doc.append(f"The beam is discretized into {len(x)} sections, scaled with the number of load segments, to ensure high resolution in the resulting diagrams.")
         
         with doc.create(Subsection('Global Equilibrium')):
             doc.append("The support reactions $R_A$ and $R_B$ are calculated by taking moments about support A:")
@@ -247,37 +226,17 @@ def create_report():
             description.add_item(NoEscape(r'$R_A$ (Left Support):'), f' {ra:.2f} kN')
             description.add_item(NoEscape(r'$R_B$ (Right Support):'), f' {rb:.2f} kN')
 
+        data_file = write_diagram_data(output_path, x, V, M)
+
         # SFD
         with doc.create(Subsection('Shear Force Diagram (SFD)')):
             doc.append(f"The maximum absolute shear force is {abs(stats['v_max']):.2f} kN, occurring at {stats['v_pos']:.2f} m.")
-            
-            with doc.create(Figure(position='H')) as plot_fig:
-                plot_fig.append(NoEscape(r'\centering'))
-                with plot_fig.create(TikZ()) as tikz:
-                    sfd_coords = generate_tikz_coords(x, V)
-                    axis_options = r"width=0.9\textwidth, height=6.5cm, axis x line=middle, axis y line=left, xlabel={Position (m)}, ylabel={V (kN)}, grid=major, enlarge x limits=false"
-                    tikz.append(NoEscape(r'\begin{axis}[' + axis_options + r']'))
-                    tikz.append(NoEscape(r'\addplot[name path=f, blue, thick] coordinates {' + sfd_coords + r'};'))
-                    tikz.append(NoEscape(r'\path[name path=axis] (axis cs:0,0) -- (axis cs:' + str(L) + r',0);'))
-                    tikz.append(NoEscape(r'\addplot[blue!10] fill between[of=f and axis];'))
-                    tikz.append(NoEscape(r'\end{axis}'))
-                plot_fig.add_caption('Shear Force Diagram (SFD)')
+            emit_diagram(doc, data_file, 'V', 'Shear Force Diagram (SFD)', 'blue', 'V (kN)', L)
 
         # BMD
         with doc.create(Subsection('Bending Moment Diagram (BMD)')):
             doc.append(f"The maximum absolute bending moment (critical section) is {abs(stats['m_max']):.2f} kNm, occurring at {stats['m_pos']:.2f} m.")
-            
-            with doc.create(Figure(position='H')) as plot_fig:
-                plot_fig.append(NoEscape(r'\centering'))
-                with plot_fig.create(TikZ()) as tikz:
-                    bmd_coords = generate_tikz_coords(x, M)
-                    axis_options = r"width=0.9\textwidth, height=6.5cm, axis x line=middle, axis y line=left, xlabel={Position (m)}, ylabel={M (kNm)}, grid=major, enlarge x limits=false"
-                    tikz.append(NoEscape(r'\begin{axis}[' + axis_options + r']'))
-                    tikz.append(NoEscape(r'\addplot[name path=f, red, thick] coordinates {' + bmd_coords + r'};'))
-                    tikz.append(NoEscape(r'\path[name path=axis] (axis cs:0,0) -- (axis cs:' + str(L) + r',0);'))
-                    tikz.append(NoEscape(r'\addplot[red!10] fill between[of=f and axis];'))
-                    tikz.append(NoEscape(r'\end{axis}'))
-                plot_fig.add_caption('Bending Moment Diagram (BMD)')
+            emit_diagram(doc, data_file, 'M', 'Bending Moment Diagram (BMD)', 'red', 'M (kNm)', L)
 
     # 5. Conclusion
     with doc.create(Section('Conclusion')):
@@ -287,14 +246,55 @@ def create_report():
         doc.append(NoEscape(r'\par\vfill'))
         doc.append(NoEscape(r'\begin{center} \textit{End of Engineering Report} \end{center}'))
 
+    if not pdf:
+        doc.generate_tex(output_path)
+        print(f"TeX generated: {output_path}.tex")
+        return
+
     # Generate PDF
     try:
-        doc.generate_pdf(OUTPUT_FILENAME, clean_tex=False, compiler='pdflatex')
-        print(f"PDF generated: {OUTPUT_FILENAME}.pdf")
+        compile_pdf(doc, output_path)
+        print(f"PDF generated: {output_path}.pdf")
     except Exception as e:
         print("PDF Generation Failed (likely due to missing LaTeX compiler).")
         print("However, the .tex file has been generated.")
         print(f"Error: {e}")
 
+def serve(input_file=INPUT_FILE, output_path=OUTPUT_FILENAME, interval=1.0):
+    """
+    Keeps one latexmk -pvc process compiling the report and rewrites the .tex
+    whenever input_file changes, so each dataset only costs an incremental rebuild.
+    """
+    create_report(input_file, output_path, pdf=False)
+    watcher = subprocess.Popen(
+        ['latexmk', '-pdf', '-pvc', '-view=none', '-interaction=nonstopmode', os.path.basename(output_path) + '.tex'],
+        cwd=os.path.dirname(os.path.abspath(output_path)))
+    
+    last_mtime = os.path.getmtime(input_file)
+    try:
+        while watcher.poll() is None:
+            time.sleep(interval)
+            try:
+                mtime = os.path.getmtime(input_file)
+                if mtime != last_mtime:
+                    last_mtime = mtime
+                    create_report(input_file, output_path, pdf=False)
+            except Exception as e:
+                # e.g. BadZipFile while the workbook is still being saved;
+                # finishing the save changes the mtime again, which retries it
+                print(f"Could not rebuild the report: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.terminate()
+
 if __name__ == "__main__":
-    create_report()
+    parser = argparse.ArgumentParser(description="Generate the simply supported beam analysis report.")
+    parser.add_argument('--serve', action='store_true',
+                        help="keep latexmk -pvc running and rebuild the report whenever the input file changes")
+    args = parser.parse_args()
+    
+    if args.serve:
+        serve()
+    else:
+        create_report()
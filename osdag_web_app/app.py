@@ -1,80 +1,325 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, abort
+from flask.json.provider import JSONProvider
 import matplotlib
 matplotlib.use('Agg') # Non-interactive backend
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import io
-import base64
+import gzip
+import threading
+import time
+import uuid
+import queue
+from functools import lru_cache
 import numpy as np
+try:
+    from numba import njit
+except ImportError: # Numba is optional, evaluate_sections falls back to NumPy
+    njit = None
+try:
+    import orjson
+except ImportError: # Falls back to Flask's stdlib-json provider
+    orjson = None
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify and request.json."""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
+UDL_SAMPLES = 16 # Interior samples per UDL for the parabolic moment curve
+SAMPLE_DTYPE = np.float32 # Diagram samples are display-only; reactions stay float64
 
-# --- ENGINEERING LOGIC (Copied from main.py) ---
-def calculate_reactions(loads, length):
-    moment_sum_a = 0
-    total_load = 0
-    for load in loads:
-        if load['type'] == 'point':
-            P = float(load['mag'])
-            x = float(load['pos'])
-            moment_sum_a += P * x
-            total_load += P
-        elif load['type'] == 'udl':
-            w = float(load['mag'])
-            x1 = float(load['start'])
-            x2 = float(load['end'])
-            span = x2 - x1
-            total_w = w * span
-            centroid = x1 + (span / 2)
-            moment_sum_a += total_w * centroid
-            total_load += total_w
+# Interior UDL sample positions on [0, 1]; the served grid is otherwise the load breakpoints
+_UDL_T = np.linspace(0.0, 1.0, UDL_SAMPLES + 2, dtype=SAMPLE_DTYPE)[1:-1]
+
+# --- ENGINEERING LOGIC (web-only; the report uses osdag_project/analysis.py) ---
+def parse_loads(loads):
+    """Converts the JSON load records once into float64 arrays
+    (pt_P, pt_x, udl_w, udl_x1, udl_x2) used by everything downstream."""
+    point_loads = [l for l in loads if l['type'] == 'point']
+    udl_loads = [l for l in loads if l['type'] == 'udl']
+    return (
+        np.asarray([float(l['mag']) for l in point_loads], dtype=np.float64),
+        np.asarray([float(l['pos']) for l in point_loads], dtype=np.float64),
+        np.asarray([float(l['mag']) for l in udl_loads], dtype=np.float64),
+        np.asarray([float(l['start']) for l in udl_loads], dtype=np.float64),
+        np.asarray([float(l['end']) for l in udl_loads], dtype=np.float64),
+    )
+
+def calculate_reactions(pt_P, pt_x, udl_w, udl_x1, udl_x2, length):
+    udl_total = udl_w * (udl_x2 - udl_x1)
+    udl_centroid = udl_x1 + (udl_x2 - udl_x1) / 2
+    total_load = pt_P.sum() + udl_total.sum()
+    moment_sum_a = pt_P @ pt_x + udl_total @ udl_centroid
     rb = moment_sum_a / length
     ra = total_load - rb
     return ra, rb
 
-def calculate_arrays(loads, ra, length, num_points=500):
-    x_vals = np.linspace(0, length, num_points)
-    shear_vals = []
-    moment_vals = []
-    for x in x_vals:
+def calculate_arrays_exact(pt_P, pt_x, udl_w, udl_x1, udl_x2, ra, length):
+    """V and M sampled only where the curves bend: V is piecewise linear and M piecewise
+    quadratic between load breakpoints, so the breakpoints plus a few samples inside each
+    UDL are enough for a plot that joins the vertices with straight lines."""
+    pt_x, udl_x1, udl_x2 = (a.astype(SAMPLE_DTYPE) for a in (pt_x, udl_x1, udl_x2))
+    length = SAMPLE_DTYPE(length)
+    # Each point load is also sampled just to its right, so the shear jump is drawn vertical
+    right_of_point = np.nextafter(pt_x, SAMPLE_DTYPE(np.inf))
+    udl_inner = (udl_x1[:, None] + (udl_x2 - udl_x1)[:, None] * _UDL_T).ravel()
+    x_vals = np.unique(np.concatenate((np.array([0, length], dtype=SAMPLE_DTYPE), pt_x, right_of_point, udl_x1, udl_x2, udl_inner)))
+    x_vals = x_vals[(x_vals >= 0) & (x_vals <= length)]
+    shear_vals, moment_vals = evaluate_sections(x_vals, pt_P, pt_x, udl_w, udl_x1, udl_x2, ra)
+    return x_vals, shear_vals, moment_vals
+
+def _beam_kernel(x, ra, pt_P, pt_x, udl_w, udl_x1, udl_x2, V_out, M_out):
+    """Fills preallocated V and M buffers section by section, without the
+    (sections x loads) temporaries of the broadcast version."""
+    for i in range(x.size):
+        xi = x[i]
         v = ra
-        m = ra * x
-        for load in loads:
-            if load['type'] == 'point':
-                P = float(load['mag'])
-                xp = float(load['pos'])
-                if x > xp:
-                    v -= P
-                    m -= P * (x - xp)
-            elif load['type'] == 'udl':
-                w = float(load['mag'])
-                x1 = float(load['start'])
-                x2 = float(load['end'])
-                if x > x1:
-                    udl_end = min(x, x2)
-                    udl_span = udl_end - x1
-                    load_force = w * udl_span
-                    load_centroid = x1 + (udl_span / 2)
-                    v -= load_force
-                    m -= load_force * (x - load_centroid)
-        shear_vals.append(v)
-        moment_vals.append(m)
-    return x_vals, np.array(shear_vals), np.array(moment_vals)
-
-def create_plot(x, y, title, color, ylabel):
-    plt.figure(figsize=(10, 5))
-    plt.plot(x, y, color=color, linewidth=2)
-    plt.fill_between(x, y, color=color, alpha=0.1)
-    plt.title(title)
-    plt.xlabel('Position (m)')
-    plt.ylabel(ylabel)
-    plt.grid(True, linestyle='--', alpha=0.7)
-    
-    # Save to base64
+        m = ra * xi
+        for j in range(pt_P.size):
+            if xi > pt_x[j]:
+                v -= pt_P[j]
+                m -= pt_P[j] * (xi - pt_x[j])
+        for j in range(udl_w.size):
+            span = max(min(xi, udl_x2[j]) - udl_x1[j], 0)
+            force = udl_w[j] * span
+            v -= force
+            m -= force * (xi - udl_x1[j] - span / 2)
+        V_out[i] = v
+        M_out[i] = m
+
+if njit is not None:
+    _beam_kernel = njit(cache=True, fastmath=True)(_beam_kernel)
+    # Compile (or load from cache) now rather than on the first request
+    _dummy = np.zeros(1, dtype=SAMPLE_DTYPE)
+    _beam_kernel(_dummy, _dummy[0], _dummy, _dummy, _dummy, _dummy, _dummy, np.empty_like(_dummy), np.empty_like(_dummy))
+
+def evaluate_sections(x_vals, pt_P, pt_x, udl_w, udl_x1, udl_x2, ra):
+    # Loads are evaluated in the samples' precision, so x > xp compares like for like
+    dtype = x_vals.dtype
+    pt_P, pt_x, udl_w, udl_x1, udl_x2 = (a.astype(dtype, copy=False) for a in (pt_P, pt_x, udl_w, udl_x1, udl_x2))
+    ra = dtype.type(ra)
+
+    if njit is not None:
+        shear_vals = np.empty(len(x_vals), dtype=dtype)
+        moment_vals = np.empty(len(x_vals), dtype=dtype)
+        _beam_kernel(x_vals, ra, pt_P, pt_x, udl_w, udl_x1, udl_x2, shear_vals, moment_vals)
+        return shear_vals, moment_vals
+
+    # Rows are sections x, columns are loads. Each (sections x loads) buffer is
+    # allocated once and filled in place; einsum fuses the multiply and row sum.
+    x = x_vals[:, None]
+    shear_vals = np.full(len(x_vals), ra, dtype=dtype)
+    moment_vals = np.multiply(x_vals, ra)
+
+    # Point loads: the ramp max(x - xp, 0) is the lever arm, already zero left of the load
+    active = np.greater(x, pt_x, out=np.empty((len(x_vals), pt_x.size), dtype=bool))
+    ramp = np.subtract(x, pt_x, out=np.empty((len(x_vals), pt_x.size), dtype=dtype))
+    np.maximum(ramp, 0, out=ramp)
+    shear_vals -= np.einsum('ij,j->i', active, pt_P)
+    moment_vals -= np.einsum('ij,j->i', ramp, pt_P)
+
+    # UDLs: loaded length clip(x - x1, 0, x2 - x1), acting at its centroid
+    udl_span = np.subtract(x, udl_x1, out=np.empty((len(x_vals), udl_w.size), dtype=dtype))
+    np.clip(udl_span, 0, udl_x2 - udl_x1, out=udl_span)
+    udl_arm = np.multiply(udl_span, -0.5, out=np.empty_like(udl_span))
+    udl_arm += x
+    udl_arm -= udl_x1
+    shear_vals -= np.einsum('ij,j->i', udl_span, udl_w)
+    moment_vals -= np.einsum('ij,j,ij->i', udl_span, udl_w, udl_arm)
+    return shear_vals, moment_vals
+
+def row_scale(y, height):
+    """Maps values to pixel rows (top = 0), padded so the curve and the zero line fit."""
+    y_min, y_max = min(y.min(), 0.0), max(y.max(), 0.0)
+    pad = 0.05 * ((y_max - y_min) or 1.0)
+    y_min, y_max = y_min - pad, y_max + pad
+    return lambda v: (y_max - v) / (y_max - y_min) * (height - 1)
+
+def svg_panel(x, y, color, ylabel, unit, top=0, size=(1000, 500)):
+    """Filled line plot as an SVG group placed `top` units down; the browser does the drawing.
+    Ticks are at 0 and every tenth of the span along x and at min/0/max along y, and
+    the extreme value is marked, so readings can be taken off the diagram."""
+    width, height = size
+    left, right, pad_top, bottom = 80, 20, 15, 45
+    plot_w, plot_h = width - left - right, height - pad_top - bottom
+    to_row = row_scale(y, plot_h)
+    to_col = lambda v: left + (v - x[0]) / ((x[-1] - x[0]) or 1.0) * (plot_w - 1)
+    cols = to_col(x)
+    rows = pad_top + to_row(y)
+    zero_row = pad_top + to_row(0.0)
+    x_ticks = np.linspace(x[0], x[-1], 11).tolist()
+    # Zero always gets a tick; the extremes only where their labels will not overlap it
+    y_ticks = [0.0] + [v for v in {float(y.min()), float(y.max())} if abs(to_row(v) - to_row(0.0)) > 16]
+
+    # One join over plain floats instead of formatting NumPy scalars point by point
+    points = " ".join(map("{:.1f},{:.1f}".format, cols.tolist(), rows.tolist()))
+    grid = "".join(f"M{to_col(v):.1f} {pad_top}V{pad_top + plot_h}" for v in x_ticks)
+    grid += "".join(f"M{left} {pad_top + to_row(v):.1f}H{left + plot_w}" for v in y_ticks)
+    labels = "".join(
+        f'<text x="{to_col(v):.1f}" y="{pad_top + plot_h + 18}" text-anchor="middle">{round(v, 2):g}</text>'
+        for v in x_ticks
+    )
+    labels += "".join(
+        f'<text x="{left - 8}" y="{pad_top + to_row(v) + 4:.1f}" text-anchor="end">{v:.2f}</text>'
+        for v in y_ticks
+    )
+    labels += (
+        f'<text x="{left + plot_w / 2:.1f}" y="{height - 6}" text-anchor="middle">Position (m)</text>'
+        f'<text transform="translate(16 {pad_top + plot_h / 2:.1f}) rotate(-90)" text-anchor="middle">{ylabel}</text>'
+    )
+
+    # Peak |value|, labelled above a maximum or below a minimum
+    peak = int(np.abs(y).argmax())
+    if y[peak] != 0:
+        px, py = float(cols[peak]), float(rows[peak])
+        label_x = min(max(px, left + 60), left + plot_w - 60)
+        label_y = py - 10 if y[peak] > 0 else py + 20
+        labels += (
+            f'<circle cx="{px:.1f}" cy="{py:.1f}" r="4" fill="{color}"/>'
+            f'<text x="{label_x:.1f}" y="{label_y:.1f}" text-anchor="middle" fill="{color}" font-weight="600">{y[peak]:.2f} {unit}</text>'
+        )
+
+    return (
+        f'<g transform="translate(0 {top})" font-family="sans-serif" font-size="14" fill="#334155">'
+        f'<path d="{grid}" stroke="#e2e8f0" fill="none"/>'
+        f'<polygon points="{left},{zero_row:.1f} {points} {left + plot_w - 1},{zero_row:.1f}" fill="{color}" fill-opacity="0.1"/>'
+        f'<path d="M{left} {zero_row:.1f}H{left + plot_w}" stroke="#64748b"/>'
+        f'<polyline points="{points}" fill="none" stroke="{color}" stroke-width="2"/>'
+        f'{labels}'
+        '</g>'
+    )
+
+SFD_COLOR = '#3b82f6'
+BMD_COLOR = '#ef4444'
+PANEL_SIZE = (1000, 500) # Width and height of each diagram in the combined image
+PANEL_GAP = 20 # Blank rows between the SFD and the BMD
+
+_TL = threading.local()
+
+def plot_axes():
+    """Per-thread Matplotlib figure with the SFD and BMD axes, created once and
+    cleared for each plot instead of building a new figure and canvas every time."""
+    if not hasattr(_TL, 'fig'):
+        _TL.fig = Figure(figsize=(10, 8), layout='constrained')
+        FigureCanvasAgg(_TL.fig)
+        _TL.axes = _TL.fig.subplots(2, 1)
+    for ax in _TL.axes:
+        ax.clear()
+    return _TL.fig, _TL.axes
+
+def create_dual_plot(x, V, M, fmt='png'):
+    """SFD above BMD in one image, so there is a single canvas and a single encode.
+    SVG is drawn from strings; PNG goes through Matplotlib so it keeps its axes and labels."""
+    width, height = PANEL_SIZE
+    if fmt == 'svg':
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {2 * height + PANEL_GAP}">'
+            + svg_panel(x, V, SFD_COLOR, 'Shear (kN)', 'kN', 0, PANEL_SIZE)
+            + svg_panel(x, M, BMD_COLOR, 'Moment (kNm)', 'kNm', height + PANEL_GAP, PANEL_SIZE)
+            + '</svg>'
+        ).encode()
+
+    fig, (ax_v, ax_m) = plot_axes()
+    for ax, y, color, ylabel in ((ax_v, V, SFD_COLOR, 'Shear (kN)'), (ax_m, M, BMD_COLOR, 'Moment (kNm)')):
+        ax.plot(x, y, color=color, linewidth=2)
+        ax.fill_between(x, y, color=color, alpha=0.1)
+        ax.set_xlabel('Position (m)')
+        ax.set_ylabel(ylabel)
+        ax.grid(True, linestyle='--', alpha=0.7)
+
     img = io.BytesIO()
-    plt.savefig(img, format='png', bbox_inches='tight')
-    img.seek(0)
-    plt.close()
-    return base64.b64encode(img.getvalue()).decode()
+    fig.savefig(img, format='png')
+    return img.getvalue()
+
+def canonical_loads(pt_P, pt_x, udl_w, udl_x1, udl_x2):
+    """Hashable, order-independent form of the parsed loads, used as the cache key:
+    sorted (P, x) rows for point loads and (w, x1, x2) rows for UDLs."""
+    points = np.round(np.column_stack((pt_P, pt_x)), 6).tolist()
+    udls = np.round(np.column_stack((udl_w, udl_x1, udl_x2)), 6).tolist()
+    return tuple(sorted(map(tuple, points))), tuple(sorted(map(tuple, udls)))
+
+@lru_cache(maxsize=256)
+def analyse(loads_key):
+    """Reactions and diagram samples for a canonical load tuple (LRU-cached)."""
+    # Back to one array per quantity, shared by reactions and diagrams
+    pt_P, pt_x = np.array(loads_key[0], dtype=np.float64).reshape(-1, 2).T.copy()
+    udl_w, udl_x1, udl_x2 = np.array(loads_key[1], dtype=np.float64).reshape(-1, 3).T.copy()
+
+    # Determine length
+    length = float(max(pt_x.max(initial=10.0), udl_x2.max(initial=10.0))) # Min 10m
+
+    ra, rb = calculate_reactions(pt_P, pt_x, udl_w, udl_x1, udl_x2, length)
+    x, V, M = calculate_arrays_exact(pt_P, pt_x, udl_w, udl_x1, udl_x2, ra, length)
+
+    return ra, rb, x, V, M
+
+@lru_cache(maxsize=256)
+def render_diagrams(loads_key, fmt='png'):
+    """Combined SFD/BMD image bytes for a canonical load tuple (LRU-cached)."""
+    x, V, M = analyse(loads_key)[2:]
+    return create_dual_plot(x, V, M, fmt)
+
+# Rendered diagrams, served as binary from /img/<key> rather than base64 in the JSON
+IMG_TTL = 300 # Seconds an image stays fetchable
+IMG_CACHE = {} # key -> (bytes, mimetype, expires_at, gzipped bytes or None)
+_IMG_LOCK = threading.Lock()
+# SVG markup compresses well; PNG is already deflated, so it is sent as is
+GZIP_MIMETYPES = {'image/svg+xml'}
+
+def store_image(data, mimetype, ttl=IMG_TTL):
+    """Keeps an image for ttl seconds and returns its URL; expired entries are dropped here."""
+    now = time.time()
+    key = uuid.uuid4().hex
+    # Compressed once here, at the cheapest level, rather than on every fetch
+    gzipped = gzip.compress(data, compresslevel=1) if mimetype in GZIP_MIMETYPES else None
+    with _IMG_LOCK:
+        for k in [k for k, entry in IMG_CACHE.items() if entry[2] < now]:
+            del IMG_CACHE[k]
+        IMG_CACHE[key] = (data, mimetype, now + ttl, gzipped)
+    return f'/img/{key}'
+
+# Inputs the page sends before the user edits anything: no loads at all, and the
+# default 10 kN point load at 5 m. Their diagrams are rendered once at import and
+# answered directly, with the image URL instead of a job id.
+PRESET_LOADS = [[], [{'type': 'point', 'mag': 10, 'pos': 5}]]
+PRESET_RESPONSES = {}
+for _loads in PRESET_LOADS:
+    _key = canonical_loads(*parse_loads(_loads))
+    for _fmt, _mimetype in (('png', 'image/png'), ('svg', 'image/svg+xml')):
+        _ra, _rb = analyse(_key)[:2]
+        PRESET_RESPONSES[_key, _fmt] = {
+            'ra': round(_ra, 2),
+            'rb': round(_rb, 2),
+            'plot_url': store_image(render_diagrams(_key, _fmt), _mimetype, ttl=float('inf'))
+        }
+
+# Diagrams are rendered off the request thread: /calculate answers with the
+# reactions and a job id, and the page polls /plot/<job_id> for the image
+PLOT_JOBS = {} # job_id -> (None while pending, then the image URL or an error; submitted_at)
+_JOB_QUEUE = queue.Queue()
+_JOB_LOCK = threading.Lock()
+
+def plot_worker():
+    while True:
+        job_id, loads_key, fmt = _JOB_QUEUE.get()
+        try:
+            mimetype = 'image/svg+xml' if fmt == 'svg' else 'image/png'
+            result = {'plot_url': store_image(render_diagrams(loads_key, fmt), mimetype)}
+        except Exception as e:
+            result = {'error': str(e)}
+        with _JOB_LOCK:
+            if job_id in PLOT_JOBS:
+                PLOT_JOBS[job_id] = (result, PLOT_JOBS[job_id][1])
+
+threading.Thread(target=plot_worker, daemon=True).start()
 
 # --- ROUTES ---
 @app.route('/')
@@ -84,28 +329,55 @@ def index():
 @app.route('/calculate', methods=['POST'])
 def calculate():
     data = request.json
-    loads = data['loads']
-    
-    # Determine length
-    positions = []
-    for l in loads:
-        if l['type'] == 'point': positions.append(float(l['pos']))
-        if l['type'] == 'udl': positions.append(float(l['end']))
-    
-    length = max(float(max(positions, default=10)), 10.0) # Min 10m
-    
-    ra, rb = calculate_reactions(loads, length)
-    x, V, M = calculate_arrays(loads, ra, length)
-    
-    sfd_img = create_plot(x, V, 'Shear Force Diagram', '#3b82f6', 'Shear (kN)')
-    bmd_img = create_plot(x, M, 'Bending Moment Diagram', '#ef4444', 'Moment (kNm)')
-    
-    return jsonify({
-        'ra': round(ra, 2),
-        'rb': round(rb, 2),
-        'sfd': sfd_img,
-        'bmd': bmd_img
-    })
+    # 'png' by default, or 'svg' markup for the browser to draw
+    fmt = 'svg' if data.get('format') == 'svg' else 'png'
+    loads_key = canonical_loads(*parse_loads(data['loads']))
+    if (loads_key, fmt) in PRESET_RESPONSES:
+        return jsonify(PRESET_RESPONSES[loads_key, fmt])
+    ra, rb = analyse(loads_key)[:2]
+
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    with _JOB_LOCK:
+        # Jobs nobody came back for expire along with their images
+        for k in [k for k, (_, submitted_at) in PLOT_JOBS.items() if now - submitted_at > IMG_TTL]:
+            del PLOT_JOBS[k]
+        PLOT_JOBS[job_id] = (None, now)
+    _JOB_QUEUE.put((job_id, loads_key, fmt))
+    return jsonify({'ra': round(ra, 2), 'rb': round(rb, 2), 'job_id': job_id})
+
+@app.route('/plot/<job_id>')
+def plot(job_id):
+    with _JOB_LOCK:
+        if job_id not in PLOT_JOBS:
+            abort(404)
+        if PLOT_JOBS[job_id][0] is None:
+            return jsonify({'status': 'pending'}), 202
+        # Delivered once; the image itself stays fetchable for IMG_TTL
+        result = PLOT_JOBS.pop(job_id)[0]
+    if 'error' in result:
+        return jsonify(result), 500
+    return jsonify(result)
+
+@app.route('/img/<key>')
+def image(key):
+    with _IMG_LOCK:
+        entry = IMG_CACHE.get(key)
+    if entry is None or entry[2] < time.time():
+        abort(404)
+    data, mimetype, _, gzipped = entry
+    # The stored bytes go out as the body directly; wrapping them in a BytesIO for
+    # send_file only added a file wrapper that re-reads them in chunks
+    if gzipped is None:
+        return app.response_class(data, mimetype=mimetype)
+
+    if request.accept_encodings['gzip'] > 0:
+        response = app.response_class(gzipped, mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = app.response_class(data, mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+    return response
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -64,7 +64,7 @@ function analyzeBeam() {
     fetch('/calculate', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ loads: loads })
+        body: JSON.stringify({ loads: loads, format: 'svg' })
     })
         .then(response => response.json())
         .then(data => {
@@ -75,8 +75,29 @@ function analyzeBeam() {
             document.getElementById('val-ra').innerText = data.ra + " kN";
             document.getElementById('val-rb').innerText = data.rb + " kN";
 
-            document.getElementById('sfd-img').src = "data:image/png;base64," + data.sfd;
-            document.getElementById('bmd-img').src = "data:image/png;base64," + data.bmd;
+            // 4. Diagrams are rendered in the background, unless precomputed
+            if (data.plot_url) {
+                document.getElementById('plot-img').src = data.plot_url;
+            } else {
+                pollPlots(data.job_id);
+            }
         })
         .catch(err => alert("Error analyzing: " + err));
 }
+
+function pollPlots(jobId) {
+    fetch('/plot/' + jobId)
+        .then(response => {
+            if (response.status === 202) {
+                setTimeout(() => pollPlots(jobId), 100);
+                return;
+            }
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+            return response.json().then(data => {
+                document.getElementById('plot-img').src = data.plot_url;
+            });
+        })
+        .catch(err => alert("Error drawing diagrams: " + err));
+}